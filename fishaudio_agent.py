@@ -6,6 +6,7 @@ Japanese conversation agent using Fish Audio TTS
 """
 
 import logging
+import os
 from dotenv import load_dotenv
 
 # Load environment variables BEFORE importing plugins
@@ -16,10 +17,12 @@ from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
     metrics,
 )
+from livekit.agents.log import logger as agents_logger
 from livekit.agents.voice import MetricsCollectedEvent
 from livekit.plugins import openai, silero
 from livekit.plugins import fishaudio
@@ -27,22 +30,29 @@ from livekit.plugins import fishaudio
 logger = logging.getLogger("fishaudio-agent")
 logger.setLevel(logging.INFO)
 
+# Shared by every session the worker runs
+JA_INSTRUCTIONS = (
+    "あなたは親しみやすい日本語の音声アシスタントです。"
+    "自然な日本語で会話をしてください。"
+    "返答は簡潔で会話的にしてください。"
+    "ユーザーの質問に対して、丁寧かつフレンドリーに答えてください。"
+    "日常会話のように自然なトーンで話してください。"
+)
+JA_GREETING_INSTRUCTIONS = "ユーザーに温かく挨拶してください"
+
 
 class JapaneseAgent(Agent):
     def __init__(self) -> None:
-        super().__init__(
-            instructions=(
-                "あなたは親しみやすい日本語の音声アシスタントです。"
-                "自然な日本語で会話をしてください。"
-                "返答は簡潔で会話的にしてください。"
-                "ユーザーの質問に対して、丁寧かつフレンドリーに答えてください。"
-                "日常会話のように自然なトーンで話してください。"
-            ),
-        )
+        super().__init__(instructions=JA_INSTRUCTIONS)
 
     async def on_enter(self):
         # Generate initial greeting in Japanese
-        self.session.generate_reply(instructions="ユーザーに温かく挨拶してください")
+        self.session.generate_reply(instructions=JA_GREETING_INSTRUCTIONS)
+
+
+def prewarm(proc: JobProcess):
+    """Load the VAD model once per worker process instead of once per job"""
+    proc.userdata["vad"] = silero.VAD.load()
 
 
 async def entrypoint(ctx: JobContext):
@@ -53,10 +63,20 @@ async def entrypoint(ctx: JobContext):
     # Create Japanese agent instance
     agent = JapaneseAgent()
 
+    # Configure Fish Audio TTS for Japanese
+    fish_tts = fishaudio.TTS(
+        language="ja",  # Japanese language
+        temperature=0.7,  # Sampling temperature (0.0 to 1.0)
+        top_p=0.7,  # Nucleus sampling parameter
+        reference_id="fbea303b64374bffb8843569404b095e"  # Optional: Use a specific Japanese voice
+    )
+    # Release the pooled HTTP connections held by the TTS when the job ends
+    ctx.add_shutdown_callback(fish_tts.aclose)
+
     # Configure the agent session with Fish Audio TTS for Japanese
     logger.info("⚙️  Configuring agent session with Fish Audio TTS")
     session = AgentSession(
-        vad=silero.VAD.load(),
+        vad=ctx.proc.userdata["vad"],
         stt=openai.STT(
                 model="gpt-4o-mini-transcribe",
                 language="ja", use_realtime=True),
@@ -66,34 +86,61 @@ async def entrypoint(ctx: JobContext):
                 verbosity="low",
                 tool_choice="auto",  # Automatically choose tools based on context
             ),
-        # Configure Fish Audio TTS for Japanese
-        tts=fishaudio.TTS(
-            language="ja",  # Japanese language
-            temperature=0.7,  # Sampling temperature (0.0 to 1.0)
-            top_p=0.7,  # Nucleus sampling parameter
-            reference_id="fbea303b64374bffb8843569404b095e"  # Optional: Use a specific Japanese voice
-        ),
+        tts=fish_tts,
+    )
+
+    _track_metrics(ctx, session)
+
+    # Start the session
+    logger.info("✅ Agent session starting - ready to handle conversations")
+    await session.start(agent=agent, room=ctx.room)
+
+
+async def entrypoint_realtime(ctx: JobContext):
+    """Speech-to-speech entrypoint: one realtime model replaces STT, LLM and TTS"""
+    logger.info("🚀 Starting realtime Japanese Voice Agent")
+    await ctx.connect()
+
+    agent = JapaneseAgent()
+
+    # The realtime model answers in its own voice, so Fish Audio voices are not used here
+    logger.info("⚙️  Configuring agent session with OpenAI Realtime")
+    session = AgentSession(
+        vad=ctx.proc.userdata["vad"],
+        llm=openai.realtime.RealtimeModel(voice="alloy"),
     )
 
-    # Track conversation metrics and timing
+    _track_metrics(ctx, session)
+
+    logger.info("✅ Agent session starting - ready to handle conversations")
+    await session.start(agent=agent, room=ctx.room)
+
+
+def _track_metrics(ctx: JobContext, session: AgentSession):
+    """Track conversation metrics and timing"""
     usage_collector = metrics.UsageCollector()
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
-        metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        # log_metrics builds its extra fields eagerly, skip it when its logger is above INFO
+        if agents_logger.isEnabledFor(logging.INFO):
+            metrics.log_metrics(ev.metrics)
 
     async def log_usage():
         """Log total usage summary at the end of the session"""
         summary = usage_collector.get_summary()
-        logger.info(f"📊 Session Summary | {summary}")
+        logger.info("📊 Session Summary | %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
-    # Start the session
-    logger.info("✅ Agent session starting - ready to handle conversations")
-    await session.start(agent=agent, room=ctx.room)
-
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    # AGENT_MODE=realtime trades the Fish Audio voice for a single speech-to-speech hop
+    use_realtime = os.getenv("AGENT_MODE", "pipeline") == "realtime"
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint_realtime if use_realtime else entrypoint,
+            prewarm_fnc=prewarm,
+        )
+    )
@@ -1,18 +1,22 @@
 import asyncio
 import contextlib
+import itertools
 import os
-import uuid
+import secrets
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
 import httpx
 import ormsgpack
-from fish_audio_sdk import TTSRequest, WebSocketSession
+from fish_audio_sdk import TTSRequest
 from httpx_ws import (
+    AsyncWebSocketSession,
     WebSocketDisconnect,
     WebSocketNetworkError,
     WebSocketUpgradeError,
     aconnect_ws,
 )
+from wsproto.connection import ConnectionState
 from wsproto.utilities import LocalProtocolError
 
 from livekit.agents import (
@@ -20,12 +24,23 @@ from livekit.agents import (
     APIConnectionError,
     APIConnectOptions,
     tts,
+    utils,
 )
 
+from .log import logger
+
 FISHAUDIO_API_KEY = os.getenv("FISHAUDIO_API_KEY")
 SAMPLE_RATE = 24000
 NUM_CHANNELS = 1
 MIME_TYPE = "audio/wav"
+API_BASE_URL = "https://api.fish.audio"
+
+# control frames never change, so they are encoded once
+_FLUSH_FRAME = ormsgpack.packb({"event": "flush"})
+_STOP_FRAME = ormsgpack.packb({"event": "stop"})
+
+# pings keep an idle spare socket from being dropped by proxies and load balancers
+_KEEPALIVE_PING_INTERVAL = 15.0
 
 
 @dataclass
@@ -39,6 +54,103 @@ class _TTSOptions:
     backend: str = "s1"
 
 
+def _build_tts_request(opts: _TTSOptions) -> dict:
+    # text is sent afterwards in "text" events, the start request only carries options
+    request_kwargs = {
+        "text": "",
+        "reference_id": opts.reference_id,
+        "format": "wav",
+        "temperature": opts.temperature,
+        "top_p": opts.top_p,
+        "sample_rate": SAMPLE_RATE,
+    }
+    if opts.chunk_length is not None:
+        request_kwargs["chunk_length"] = opts.chunk_length
+    if opts.latency is not None:
+        request_kwargs["latency"] = opts.latency
+
+    return TTSRequest(**request_kwargs).model_dump(exclude_none=True)
+
+
+async def _recv_audio(ws: AsyncWebSocketSession, output_emitter: tts.AudioEmitter) -> None:
+    """Push audio events into the emitter until the server finishes the session."""
+    push = output_emitter.push
+    try:
+        while True:
+            message = await ws.receive_bytes()
+            data = ormsgpack.unpackb(message)
+            event = data.get("event")
+            if event == "audio":
+                chunk = data.get("audio")
+                if chunk:
+                    push(chunk)
+                continue
+            if event == "finish":
+                if data.get("reason") == "error":
+                    raise APIConnectionError()
+                break
+    except WebSocketDisconnect as exc:
+        raise APIConnectionError() from exc
+
+
+class _WSSlot:
+    """A /v1/tts/live WebSocket held open by its own task until released.
+
+    httpx_ws binds the session to the task that entered ``aconnect_ws``, so the
+    socket is opened and closed here while a stream uses it from another task.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, backend: str, timeout: float) -> None:
+        self._ws_fut: asyncio.Future[AsyncWebSocketSession] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._released = asyncio.Event()
+        self._task = asyncio.create_task(self._run(client, backend, timeout))
+
+    @property
+    def alive(self) -> bool:
+        if self._task.done():
+            return False
+        if not self._ws_fut.done():
+            return True  # still dialing
+        return self._ws_fut.result().connection.state == ConnectionState.OPEN
+
+    async def _run(self, client: httpx.AsyncClient, backend: str, timeout: float) -> None:
+        try:
+            async with aconnect_ws(
+                "/v1/tts/live",
+                client=client,
+                headers={"model": backend},
+                timeout=timeout,
+                keepalive_ping_interval_seconds=_KEEPALIVE_PING_INTERVAL,
+            ) as ws:
+                self._ws_fut.set_result(ws)
+                await self._released.wait()
+        except Exception as e:
+            if not self._ws_fut.done():
+                self._ws_fut.set_exception(e)
+            else:
+                logger.debug("fishaudio websocket closed with an error", exc_info=e)
+        finally:
+            if not self._ws_fut.done():
+                self._ws_fut.cancel()
+
+    async def wait_ready(self) -> AsyncWebSocketSession:
+        # shielded so a cancelled waiter doesn't mark a dial in progress as done
+        return await asyncio.shield(self._ws_fut)
+
+    async def aclose(self) -> None:
+        if not self._ws_fut.done():
+            # still dialing, don't sit through the upgrade just to close the socket again
+            await utils.aio.cancel_and_wait(self._task)
+        else:
+            self._released.set()
+            await self._task
+        if not self._ws_fut.cancelled():
+            # retrieve the dial error of a spare nobody waited on
+            self._ws_fut.exception()
+
+
 class TTS(tts.TTS):
     def __init__(
         self,
@@ -67,8 +179,59 @@ class TTS(tts.TTS):
         )
         if not FISHAUDIO_API_KEY:
             raise APIConnectionError("FISHAUDIO_API_KEY not set")
-        self._ws = WebSocketSession(FISHAUDIO_API_KEY)
         self._api_key = FISHAUDIO_API_KEY
+        self._start_frame = ormsgpack.packb(
+            {"event": "start", "request": _build_tts_request(self._opts)}
+        )
+        self._client: httpx.AsyncClient | None = None
+        self._spare_ws: _WSSlot | None = None
+        self._closed = False
+        # a random per-instance prefix plus a counter keeps ids unique without uuid4
+        self._request_prefix = secrets.token_hex(3)
+        self._request_counter = itertools.count()
+
+    def _next_request_id(self) -> str:
+        return f"{self._request_prefix}{next(self._request_counter):06x}"
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # one client per TTS so streams share its SSL context and connection pool
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=API_BASE_URL,
+                headers={"Authorization": f"Bearer {self._api_key}"},
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=120),
+                timeout=DEFAULT_API_CONNECT_OPTIONS.timeout,
+            )
+        return self._client
+
+    @contextlib.asynccontextmanager
+    async def _connect_ws(self, timeout: float) -> AsyncIterator[AsyncWebSocketSession]:
+        # the live endpoint serves one session per socket, so instead of reusing a
+        # socket we keep the next one already dialed while the user is speaking
+        if self._closed:
+            # don't bring back a client that aclose() has already released
+            raise APIConnectionError("fishaudio TTS is closed")
+
+        slot, self._spare_ws = self._spare_ws, None
+        if slot is None or not slot.alive:
+            if slot is not None:
+                await slot.aclose()
+            slot = _WSSlot(self._ensure_client(), self._opts.backend, timeout)
+
+        try:
+            yield await slot.wait_ready()
+        finally:
+            await slot.aclose()
+            if not self._closed and self._spare_ws is None:
+                self._spare_ws = _WSSlot(self._ensure_client(), self._opts.backend, timeout)
+
+    def prewarm(self) -> None:
+        # dial the first socket while the session starts and the LLM produces its first
+        # tokens, so the upgrade is not paid on the first turn
+        if self._spare_ws is None and not self._closed:
+            self._spare_ws = _WSSlot(
+                self._ensure_client(), self._opts.backend, DEFAULT_API_CONNECT_OPTIONS.timeout
+            )
 
     def synthesize(
         self,
@@ -80,8 +243,7 @@ class TTS(tts.TTS):
             tts=self,
             input_text=text,
             conn_options=conn_options,
-            opts=self._opts,
-            ws=self._ws,
+            start_frame=self._start_frame,
         )
 
     def stream(
@@ -92,10 +254,18 @@ class TTS(tts.TTS):
         return Stream(
             tts=self,
             conn_options=conn_options,
-            opts=self._opts,
-            api_key=self._api_key,
+            start_frame=self._start_frame,
         )
 
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._spare_ws is not None:
+            await self._spare_ws.aclose()
+            self._spare_ws = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 class ChunkedStream(tts.ChunkedStream):
     def __init__(
@@ -104,89 +274,52 @@ class ChunkedStream(tts.ChunkedStream):
         tts: TTS,
         input_text: str,
         conn_options: APIConnectOptions,
-        opts: _TTSOptions,
-        ws: WebSocketSession,
+        start_frame: bytes,
     ) -> None:
         super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
-        self._ws = ws
-        self._opts = opts
+        self._tts: TTS = tts
+        self._start_frame = start_frame
 
     async def _run(self, output_emitter: tts.AudioEmitter) -> None:
-        request_id = str(uuid.uuid4().hex)[:12]
+        request_id = self._tts._next_request_id()
+        output_emitter.initialize(
+            request_id=request_id,
+            sample_rate=SAMPLE_RATE,
+            num_channels=NUM_CHANNELS,
+            mime_type=MIME_TYPE,
+        )
         try:
-            request_kwargs = {
-                "text": self.input_text,
-                "reference_id": self._opts.reference_id,
-                "format": "wav",
-                "temperature": self._opts.temperature,
-                "top_p": self._opts.top_p,
-                "sample_rate": SAMPLE_RATE,
-            }
-            if self._opts.chunk_length is not None:
-                request_kwargs["chunk_length"] = self._opts.chunk_length
-            if self._opts.latency is not None:
-                request_kwargs["latency"] = self._opts.latency
-
-            tts_request = TTSRequest(**request_kwargs)
-
-            loop = asyncio.get_running_loop()
-            courier_queue: asyncio.Queue = asyncio.Queue()
-            sentinel = object()
-
-            # Bridge the blocking Fish Audio generator into the async emitter.
-            def run_tts() -> None:
-                try:
-                    for chunk in self._ws.tts(tts_request, [], backend=self._opts.backend):
-                        loop.call_soon_threadsafe(courier_queue.put_nowait, chunk)
-                except Exception as exc:  # pragma: no cover - network runtime
-                    loop.call_soon_threadsafe(courier_queue.put_nowait, exc)
-                finally:
-                    loop.call_soon_threadsafe(courier_queue.put_nowait, sentinel)
-
-            worker = loop.run_in_executor(None, run_tts)
+            async with self._tts._connect_ws(self._conn_options.timeout) as ws:
+                await ws.send_bytes(self._start_frame)
+                await ws.send_bytes(ormsgpack.packb({"event": "text", "text": self.input_text}))
+                await ws.send_bytes(_STOP_FRAME)
+                await _recv_audio(ws, output_emitter)
+        except (
+            httpx.HTTPError,
+            asyncio.TimeoutError,
+            WebSocketNetworkError,
+            WebSocketUpgradeError,
+            LocalProtocolError,
+        ) as exc:
+            raise APIConnectionError() from exc
 
-            output_emitter.initialize(
-                request_id=request_id,
-                sample_rate=SAMPLE_RATE,
-                num_channels=NUM_CHANNELS,
-                mime_type=MIME_TYPE,
-            )
-            error: Exception | None = None
-            while True:
-                item = await courier_queue.get()
-                if item is sentinel:
-                    break
-                if isinstance(item, Exception):
-                    error = item
-                    continue
-                if error is None:
-                    output_emitter.push(item)
-
-            await worker
-            if error is not None:
-                raise error
-            output_emitter.flush()
-        except Exception as e:
-            raise APIConnectionError() from e
+        output_emitter.flush()
 
 
 class Stream(tts.SynthesizeStream):
-    API_BASE_URL = "https://api.fish.audio"
-
     def __init__(
         self,
         *,
         tts: TTS,
         conn_options: APIConnectOptions,
-        opts: _TTSOptions,
-        api_key: str,
+        start_frame: bytes,
     ) -> None:
         super().__init__(tts=tts, conn_options=conn_options)
-        self._opts = opts
-        self._api_key = api_key
+        self._tts: TTS = tts
+        self._start_frame = start_frame
 
     async def _run(self, output_emitter: tts.AudioEmitter) -> None:
-        request_id = str(uuid.uuid4().hex)[:12]
+        request_id = self._tts._next_request_id()
         output_emitter.initialize(
             request_id=request_id,
             sample_rate=SAMPLE_RATE,
@@ -196,110 +329,71 @@ class Stream(tts.SynthesizeStream):
         )
         output_emitter.start_segment(segment_id=request_id)
 
-        request_kwargs = {
-            "text": "",
-            "reference_id": self._opts.reference_id,
-            "format": "wav",
-            "temperature": self._opts.temperature,
-            "top_p": self._opts.top_p,
-            "sample_rate": SAMPLE_RATE,
-        }
-        if self._opts.chunk_length is not None:
-            request_kwargs["chunk_length"] = self._opts.chunk_length
-        if self._opts.latency is not None:
-            request_kwargs["latency"] = self._opts.latency
-
-        tts_request = TTSRequest(**request_kwargs).model_dump(exclude_none=True)
-
-        timeout = self._conn_options.timeout
-        client = httpx.AsyncClient(
-            base_url=self.API_BASE_URL,
-            headers={"Authorization": f"Bearer {self._api_key}"},
-            timeout=timeout,
-        )
-
         async def _send_loop(ws) -> None:
             pending: list[str] = []
             started = False
-            last_sent = ""
 
-            async def _flush_pending(force: bool = False) -> None:
-                nonlocal started, last_sent
+            async def _flush_pending(*, flush: bool = True) -> None:
+                # only the text pushed since the previous flush is joined and sent
+                nonlocal started
                 if not pending:
                     return
                 text_raw = "".join(pending)
+                if not text_raw.strip():
+                    return  # keep the whitespace so it goes out with the next text
                 pending.clear()
-                normalized = text_raw.strip()
-                if not normalized:
-                    return
-                if not force and normalized == last_sent:
-                    return
-                last_sent = normalized
                 if not started:
                     self._mark_started()
                     started = True
-                await ws.send_bytes(
-                    ormsgpack.packb({"event": "text", "text": text_raw})
-                )
-                await ws.send_bytes(ormsgpack.packb({"event": "flush"}))
+                await ws.send_bytes(ormsgpack.packb({"event": "text", "text": text_raw}))
+                if flush:
+                    await ws.send_bytes(_FLUSH_FRAME)
 
             try:
                 async for item in self._input_ch:
                     if isinstance(item, self._FlushSentinel):
-                        await _flush_pending()
+                        if not self._input_ch.closed:
+                            # once end_input() was called, the rest is sent along with "stop"
+                            await _flush_pending()
                         continue
 
                     pending.append(item)
 
-                await _flush_pending(force=True)
+                # "stop" makes the server synthesize whatever text is left, so the
+                # trailing text goes out without a flush of its own
+                await _flush_pending(flush=False)
 
                 if started:
                     try:
-                        await ws.send_bytes(ormsgpack.packb({"event": "stop"}))
+                        await ws.send_bytes(_STOP_FRAME)
                     except LocalProtocolError:
                         pass
             except Exception:
                 raise
 
-        async def _recv_loop(ws) -> None:
-            try:
-                while True:
-                    message = await ws.receive_bytes()
-                    data = ormsgpack.unpackb(message)
-                    event = data.get("event")
-                    if event == "audio":
-                        chunk = data.get("audio")
-                        if chunk:
-                            output_emitter.push(chunk)
-                    elif event == "finish":
-                        if data.get("reason") == "error":
-                            raise APIConnectionError()
-                        break
-            except WebSocketDisconnect as exc:
-                raise APIConnectionError() from exc
-
         try:
-            async with client:
-                async with aconnect_ws(
-                    "/v1/tts/live",
-                    client=client,
-                    headers={"model": self._opts.backend},
-                ) as ws:
-                    await ws.send_bytes(
-                        ormsgpack.packb({"event": "start", "request": tts_request})
-                    )
+            async with self._tts._connect_ws(self._conn_options.timeout) as ws:
+                await ws.send_bytes(self._start_frame)
 
-                    send_task = asyncio.create_task(_send_loop(ws))
-                    recv_task = asyncio.create_task(_recv_loop(ws))
+                send_task = asyncio.create_task(_send_loop(ws))
+                recv_task = asyncio.create_task(_recv_audio(ws, output_emitter))
 
-                    try:
-                        await asyncio.gather(send_task, recv_task)
-                    finally:
-                        for task in (send_task, recv_task):
-                            if not task.done():
-                                task.cancel()
-                                with contextlib.suppress(asyncio.CancelledError):
-                                    await task
+                try:
+                    done, _ = await asyncio.wait(
+                        (send_task, recv_task), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+                    # the server finishing the session ends the stream right away, while a
+                    # sender that is done still has audio in flight
+                    if recv_task not in done:
+                        await recv_task
+                finally:
+                    for task in (send_task, recv_task):
+                        if not task.done():
+                            task.cancel()
+                            with contextlib.suppress(asyncio.CancelledError):
+                                await task
         except (
             httpx.HTTPError,
             asyncio.TimeoutError,